@@ -1,8 +1,10 @@
 # mcp_server.py
 
 import asyncio
-import json
+import orjson
+import mmap
 import os
+import time
 from typing import Any
 from dotenv import load_dotenv
 from pydantic import AnyUrl
@@ -36,39 +38,45 @@ from tools.trade import search_trade_logs, get_trade_stats
 server = Server("trading-analysis")
 
 # === Tool List ===
+# Static, so built once at import and shared by every tools/list request
+_TOOLS: list[Tool] = [
+    Tool(
+        name="extract_trade_from_image",
+        description="Extract structured trade info from a trading chart screenshot using OCR + LLM.",
+        inputSchema={
+            "type": "object",
+            "properties": {
+                "image_path": {"type": "string", "description": "Path to trading chart image"}
+            },
+            "required": ["image_path"]
+        }
+    ),
+    Tool(
+        name="search_trades",
+        description="Search logged trades by term (e.g., ticker, direction).",
+        inputSchema={
+            "type": "object",
+            "properties": {
+                "query": {"type": "string"},
+                "limit": {"type": "integer", "default": 10}
+            }
+        }
+    ),
+    Tool(
+        name="get_trading_stats",
+        description="Return aggregated stats from all logged trades.",
+        inputSchema={"type": "object", "properties": {}}
+    )
+]
+
 @server.list_tools()
 async def handle_list_tools() -> list[Tool]:
-    return [
-        Tool(
-            name="extract_trade_from_image",
-            description="Extract structured trade info from a trading chart screenshot using OCR + LLM.",
-            inputSchema={
-                "type": "object",
-                "properties": {
-                    "image_path": {"type": "string", "description": "Path to trading chart image"}
-                },
-                "required": ["image_path"]
-            }
-        ),
-        Tool(
-            name="search_trades",
-            description="Search logged trades by term (e.g., ticker, direction).",
-            inputSchema={
-                "type": "object",
-                "properties": {
-                    "query": {"type": "string"},
-                    "limit": {"type": "integer", "default": 10}
-                }
-            }
-        ),
-        Tool(
-            name="get_trading_stats",
-            description="Return aggregated stats from all logged trades.",
-            inputSchema={"type": "object", "properties": {}}
-        )
-    ]
+    return _TOOLS
 
 # === Tool Execution ===
+def _dumps(result: Any) -> str:
+    return orjson.dumps(result, option=orjson.OPT_INDENT_2).decode()
+
 @server.call_tool()
 async def handle_call_tool(name: str, arguments: dict[str, Any] | None) -> list[TextContent]:
     arguments = arguments or {}
@@ -78,44 +86,66 @@ async def handle_call_tool(name: str, arguments: dict[str, Any] | None) -> list[
             if not image_path:
                 return [TextContent(type="text", text="❌ image_path is required")]
             result = extract_trade_from_image(image_path)
-            return [TextContent(type="text", text=json.dumps(result, indent=2))]
+            _mark_trade_log_written()
+            return [TextContent(type="text", text=_dumps(result))]
 
         elif name == "search_trades":
             query = arguments.get("query", "")
             limit = arguments.get("limit", 10)
             result = search_trade_logs(query, limit)
-            return [TextContent(type="text", text=json.dumps(result, indent=2))]
+            return [TextContent(type="text", text=_dumps(result))]
 
         elif name == "get_trading_stats":
             result = get_trade_stats()
-            return [TextContent(type="text", text=json.dumps(result, indent=2))]
+            return [TextContent(type="text", text=_dumps(result))]
 
         return [TextContent(type="text", text=f"❓ Unknown tool: {name}")]
     except Exception as e:
         return [TextContent(type="text", text=f"❌ Error executing {name}: {str(e)}")]
 
 # === Resource Listing ===
+_TRADE_LOG_RESOURCE = Resource(
+    uri=AnyUrl(f"file://{TRADE_LOG_PATH}"),
+    name="Trade Log",
+    description="Complete trade history in JSONL format.",
+    mimeType="application/x-jsonlines"
+)
+_RESOURCE_CACHE_TTL = 1.0  # seconds
+_resource_cache: tuple[float, list[Resource]] = (float("-inf"), [])
+
+def _mark_trade_log_written() -> None:
+    """A save just appended to the log, so it exists without another stat"""
+    global _resource_cache
+    _resource_cache = (time.monotonic(), [_TRADE_LOG_RESOURCE])
+
 @server.list_resources()
 async def handle_list_resources() -> list[Resource]:
-    if os.path.exists(TRADE_LOG_PATH):
-        return [
-            Resource(
-                uri=AnyUrl(f"file://{TRADE_LOG_PATH}"),
-                name="Trade Log",
-                description="Complete trade history in JSONL format.",
-                mimeType="application/x-jsonlines"
-            )
-        ]
-    return []
+    global _resource_cache
+    checked_at, resources = _resource_cache
+    now = time.monotonic()
+    if now - checked_at >= _RESOURCE_CACHE_TTL:
+        resources = [_TRADE_LOG_RESOURCE] if os.path.exists(TRADE_LOG_PATH) else []
+        _resource_cache = (now, resources)
+    return resources
 
 # === Resource Reading ===
+_MMAP_THRESHOLD = 10 * 1024 * 1024  # bytes
+
+def _read_file_sync(file_path: str) -> str:
+    with open(file_path, "rb") as f:
+        if os.fstat(f.fileno()).st_size > _MMAP_THRESHOLD:
+            # decode straight from the page cache instead of copying into a read buffer
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                return str(mm, "utf-8")
+        return f.read().decode("utf-8")
+
 @server.read_resource()
 async def handle_read_resource(uri: AnyUrl) -> str:
     if str(uri).startswith("file://"):
         file_path = str(uri)[7:]
         try:
-            with open(file_path, "r", encoding="utf-8") as f:
-                return f.read()
+            # keep file I/O and decoding off the event loop
+            return await asyncio.to_thread(_read_file_sync, file_path)
         except Exception as e:
             return f"Error reading file: {str(e)}"
     return "Unsupported resource URI"
@@ -10,15 +10,20 @@ Usage examples (CLI):
 """
 
 # ---------- IMPORTS ----------
-import os, sys, json, uuid, re
+import os, sys, json, re, secrets, tempfile, asyncio, atexit, threading
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
+from contextlib import contextmanager
 from datetime import datetime
 from typing import Optional, List, Dict, Tuple
 
 from dotenv import load_dotenv
+import orjson
 from pydantic import BaseModel, field_validator
-from PIL import Image
+from PIL import Image, ImageOps
 import pytesseract
-from openai import OpenAI
+import httpx
+from openai import OpenAI, AsyncOpenAI
 
 load_dotenv()
 
@@ -28,12 +33,34 @@ TRADE_LOG_PATH = os.path.join(BASE_DIR, "logs", "trade_log.jsonl")
 OUTPUT_DIR = os.path.join(BASE_DIR, "output")
 SUMMARIES_DIR = os.path.join(BASE_DIR, "summaries")
 
+# create output locations once so the save path never has to check
+for _d in (os.path.dirname(TRADE_LOG_PATH), OUTPUT_DIR, SUMMARIES_DIR):
+    os.makedirs(_d, exist_ok=True)
+
+# strips currency symbols, spaces etc. from PnL strings like "+38.07 USD"
+_PNL_CLEAN_RE = re.compile(r'[^\d.\-+]')
+
 # ---------- OPENAI / DEEPSEEK CLIENT ----------
 client = OpenAI(
     api_key=os.getenv("DEEPSEEK_API_KEY"),                     # put in .env
     base_url=os.getenv("DEEPSEEK_API_BASE", "https://api.deepseek.com")
 )
 
+def _make_async_client() -> AsyncOpenAI:
+    """Async client for batch mode; one pooled httpx client per batch so
+    keep-alive connections never outlive the event loop that opened them"""
+    return AsyncOpenAI(
+        api_key=os.getenv("DEEPSEEK_API_KEY"),
+        base_url=os.getenv("DEEPSEEK_API_BASE", "https://api.deepseek.com"),
+        http_client=httpx.AsyncClient(
+            limits=httpx.Limits(
+                max_connections=100,
+                max_keepalive_connections=50,
+                keepalive_expiry=30.0,
+            )
+        ),
+    )
+
 # ---------- DATA SCHEMAS ----------
 class TradeData(BaseModel):
     trade_id: str
@@ -62,7 +89,7 @@ class TradeData(BaseModel):
         
         if isinstance(v, str):
             # Remove common symbols and clean the string
-            cleaned = re.sub(r'[^\d\.\-\+]', '', v.replace(',', ''))
+            cleaned = _PNL_CLEAN_RE.sub('', v.replace(',', ''))
             if cleaned:
                 try:
                     return float(cleaned)
@@ -72,87 +99,265 @@ class TradeData(BaseModel):
         return None
 
 # ---------- OCR ----------
-def extract_text_from_image(image_path: str) -> Tuple[str, Dict]:
-    """OCR text + confidence info"""
-    if not os.path.exists(image_path):
-        raise FileNotFoundError(f"Image not found: {image_path}")
-
-    img = Image.open(image_path)
-    # raw text
-    text = pytesseract.image_to_string(img)
-    # word-level data for confidence
-    data = pytesseract.image_to_data(img, output_type=pytesseract.Output.DICT)
-    
-    # Fixed confidence parsing
+# Above this many images the list-file batch mode is skipped in favour of
+# per-file OCR (very long lists can stall pytesseract's output pipe).
+BATCH_OCR_MAX_IMAGES = 500
+# Longest side screenshots are scaled down to before OCR
+OCR_MAX_SIDE = 1600
+# LSTM engine only, treat the image as one uniform block of text
+OCR_CONFIG = "--oem 1 --psm 6"
+
+def _preprocess_image(img: Image.Image) -> Image.Image:
+    """Grayscale, downscale and contrast-stretch a screenshot for OCR"""
+    img = img.convert("L")
+    if max(img.size) > OCR_MAX_SIDE:
+        img.thumbnail((OCR_MAX_SIDE, OCR_MAX_SIDE), Image.Resampling.LANCZOS)
+    return ImageOps.autocontrast(img)
+
+def _parse_ocr_data(data: Dict, indices: range, image_size: Tuple[int, int]) -> Tuple[str, Dict]:
+    """Build (text, ocr_info) from the image_to_data rows in ``indices``"""
+    # one sweep collects confidences, word count and line-grouped text
     confs = []
-    for c in data["conf"]:
+    word_count = 0
+    lines: List[str] = []
+    words: List[str] = []
+    line_key = None
+    for i in indices:
         try:
-            conf_val = int(c)
+            conf_val = int(float(data["conf"][i]))
             if conf_val > 0:
                 confs.append(conf_val)
         except (ValueError, TypeError):
+            pass
+
+        word = data["text"][i]
+        if not word or not word.strip():
             continue
-    
+        key = (data["block_num"][i], data["par_num"][i], data["line_num"][i])
+        if key != line_key and words:
+            lines.append(" ".join(words))
+            words = []
+        line_key = key
+        words.append(word.strip())
+        word_count += 1
+    if words:
+        lines.append(" ".join(words))
+
     avg_conf = sum(confs) / len(confs) if confs else 0.0
 
-    return text, {
+    return "\n".join(lines), {
         "confidence": avg_conf,
-        "total_words": len([w for w in data["text"] if w.strip()]),
-        "image_size": img.size,
+        "total_words": word_count,
+        "image_size": image_size,
     }
 
+def _ocr_prepared(image, image_size: Tuple[int, int]) -> Tuple[str, Dict]:
+    """Single OCR pass over a preprocessed PIL image or image file"""
+    # word-level data gives both text and confidence
+    data = pytesseract.image_to_data(
+        image, config=OCR_CONFIG, output_type=pytesseract.Output.DICT
+    )
+    return _parse_ocr_data(data, range(len(data["text"])), image_size)
+
+def _preprocess_to_file(image_path: str, out_path: str) -> Tuple[int, int]:
+    """Preprocess ``image_path`` into ``out_path``; returns the original size.
+
+    Top-level so ProcessPoolExecutor can pickle it.
+    """
+    with Image.open(image_path) as img:
+        img.load()
+        size = img.size
+        _preprocess_image(img).save(out_path, format="PNG", compress_level=1)
+    return size
+
+def extract_text_from_image(image_path: str) -> Tuple[str, Dict]:
+    """OCR text + confidence info"""
+    if not os.path.exists(image_path):
+        raise FileNotFoundError(f"Image not found: {image_path}")
+
+    key = _ocr_cache_key(image_path)
+    cached = _ocr_cache_get(key)
+    if cached is not None:
+        return cached
+
+    # decode once and release the file handle before OCR starts
+    with Image.open(image_path) as img:
+        img.load()
+        size = img.size
+        prepared = _preprocess_image(img)
+    result = _ocr_prepared(prepared, size)
+    _ocr_cache_put(key, result)
+    return result
+
+def extract_text_from_images(image_paths: List[str],
+                             image_sizes: Optional[List[Tuple[int, int]]] = None
+                             ) -> Optional[Dict[str, Tuple[str, Dict]]]:
+    """OCR many images in one tesseract process via a list file.
+
+    ``image_sizes`` is reported as each image's size (e.g. the original size
+    of a preprocessed copy); by default it is read from the files.
+
+    Returns {image_path: (text, ocr_info)}, or None when the batch result
+    can't be mapped back to the inputs (caller should fall back to
+    per-file OCR).
+    """
+    if not image_paths or len(image_paths) > BATCH_OCR_MAX_IMAGES:
+        return None
+
+    # tesseract treats a .txt input as a list of images, one path per line
+    fd, list_path = tempfile.mkstemp(suffix=".txt")
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            f.write("\n".join(os.path.abspath(p) for p in image_paths) + "\n")
+        data = pytesseract.image_to_data(list_path, config=OCR_CONFIG, output_type=pytesseract.Output.DICT)
+    finally:
+        os.remove(list_path)
+
+    # split rows on page_num; each single-frame image is one page
+    pages: Dict[int, List[int]] = {}
+    for i, page in enumerate(data["page_num"]):
+        pages.setdefault(int(page), []).append(i)
+    if len(pages) != len(image_paths):
+        print(f"⚠️  Batch OCR returned {len(pages)} pages for {len(image_paths)} images, falling back")
+        return None
+
+    if image_sizes is None:
+        image_sizes = []
+        for image_path in image_paths:
+            with Image.open(image_path) as img:
+                image_sizes.append(img.size)
+
+    results: Dict[str, Tuple[str, Dict]] = {}
+    for image_path, size, page in zip(image_paths, image_sizes, sorted(pages)):
+        rows = pages[page]
+        results[image_path] = _parse_ocr_data(data, range(rows[0], rows[-1] + 1), size)
+    return results
+
+# ---------- OCR CACHE ----------
+# Re-running an unchanged screenshot (e.g. while tuning the prompt) reuses
+# its OCR result; entries are keyed on path, mtime, size and OCR settings
+# and persisted between runs.
+OCR_CACHE_PATH = os.path.join(BASE_DIR, "logs", "ocr_cache.json")
+OCR_CACHE_SIZE = 256
+
+_ocr_cache: "OrderedDict[str, list]" = OrderedDict()
+_ocr_cache_lock = threading.Lock()
+_ocr_cache_dirty = False
+
+def _ocr_cache_key(image_path: str) -> str:
+    st = os.stat(image_path)
+    return f"{os.path.abspath(image_path)}|{st.st_mtime_ns}|{st.st_size}|{OCR_CONFIG}|{OCR_MAX_SIDE}"
+
+def _ocr_cache_get(key: str) -> Optional[Tuple[str, Dict]]:
+    with _ocr_cache_lock:
+        hit = _ocr_cache.get(key)
+        if hit is None:
+            return None
+        _ocr_cache.move_to_end(key)
+    text, info = hit
+    return text, dict(info, image_size=tuple(info["image_size"]))
+
+def _ocr_cache_put(key: str, result: Tuple[str, Dict]) -> None:
+    global _ocr_cache_dirty
+    text, info = result
+    with _ocr_cache_lock:
+        _ocr_cache[key] = [text, dict(info)]
+        _ocr_cache.move_to_end(key)
+        while len(_ocr_cache) > OCR_CACHE_SIZE:
+            _ocr_cache.popitem(last=False)
+        _ocr_cache_dirty = True
+
+def _load_ocr_cache() -> None:
+    try:
+        with open(OCR_CACHE_PATH, "rb") as f:
+            _ocr_cache.update(orjson.loads(f.read()))
+    except (OSError, orjson.JSONDecodeError, TypeError, ValueError):
+        _ocr_cache.clear()
+
+def _save_ocr_cache() -> None:
+    if not _ocr_cache_dirty:
+        return
+    with _ocr_cache_lock:
+        payload = orjson.dumps(_ocr_cache)
+    try:
+        _write_atomic(OCR_CACHE_PATH, payload)
+    except OSError as e:
+        print(f"⚠️  Could not save OCR cache: {e}")
+
+_load_ocr_cache()
+atexit.register(_save_ocr_cache)
+
 # ---------- AI ANALYSIS ----------
-def analyze_trade_with_ai(raw_text: str, image_path: str) -> str:
-    """Call DeepSeek (OpenAI-compatible) to structure the trade"""
-    prompt = f"""
+_PROMPT_TEMPLATE = """
 You are an expert trading analyst. Given OCR text from a trading screenshot, output ONLY valid JSON with the following keys:
 
 ticker, timeframe, entry_price, exit_price, direction, pnl, pnl_amount, date_time, reason_or_annotations
 
 IMPORTANT: For pnl_amount, extract only the numeric value (e.g., if you see "+38.07 USD", output 38.07)
 
-OCR text from {os.path.basename(image_path)}:
+OCR text from {basename}:
 \"\"\"{raw_text}\"\"\"
 
 Example output:
-{{
-  "ticker": "SOLUSD",
-  "timeframe": "5m",
-  "entry_price": 150.25,
-  "exit_price": 151.50,
-  "direction": "long",
-  "pnl": "+38.07 USD",
-  "pnl_amount": 38.07,
-  "date_time": "2025-07-06 14:20:58",
-  "reason_or_annotations": "Quick scalp trade"
-}}
+{{"ticker": "SOLUSD", "timeframe": "5m", "entry_price": 150.25, "exit_price": 151.50, "direction": "long", "pnl": "+38.07 USD", "pnl_amount": 38.07, "date_time": "2025-07-06 14:20:58", "reason_or_annotations": "Quick scalp trade"}}
 """
-    rsp = client.chat.completions.create(
-        model="deepseek-chat",
-        messages=[{"role": "user", "content": prompt}],
-        temperature=0.1,
-        max_tokens=500,
-    )
-    return rsp.choices[0].message.content
 
-# ---------- RECORD CREATION ----------
-def create_trade_record(ai_json: str, image_path: str, ocr_info: Dict) -> TradeData:
-    # strip optional back-ticks
-    cleaned = ai_json.strip()
-    if cleaned.startswith("```json"):
-        cleaned = cleaned[7:-3].strip()
-    elif cleaned.startswith("```"):
-        cleaned = cleaned[3:-3].strip()
+def _build_prompt(raw_text: str, image_path: str) -> str:
+    return _PROMPT_TEMPLATE.format(basename=os.path.basename(image_path), raw_text=raw_text)
+
+def _completion_kwargs(raw_text: str, image_path: str) -> Dict:
+    return {
+        "model": "deepseek-chat",
+        "messages": [{"role": "user", "content": _build_prompt(raw_text, image_path)}],
+        "temperature": 0.1,
+        "max_tokens": 500,
+        # JSON mode: the reply is a bare JSON object, never fenced markdown
+        "response_format": {"type": "json_object"},
+    }
+
+def analyze_trade_with_ai(raw_text: str, image_path: str) -> str:
+    """Call DeepSeek (OpenAI-compatible) to structure the trade"""
+    rsp = client.chat.completions.create(**_completion_kwargs(raw_text, image_path))
+    return rsp.choices[0].message.content or ""
+
+async def analyze_trade_with_ai_async(raw_text: str, image_path: str, aclient: AsyncOpenAI) -> str:
+    """Async variant of analyze_trade_with_ai for concurrent batch calls"""
+    rsp = await aclient.chat.completions.create(**_completion_kwargs(raw_text, image_path))
+    return rsp.choices[0].message.content or ""
+
+async def _analyze_batch(items: List[Tuple[str, str]]) -> List[object]:
+    """Run all (image_path, raw_text) analyses concurrently over one client.
+
+    Returns the AI JSON string, or the exception raised, per item.
+    """
+    async with _make_async_client() as aclient:
+        return await asyncio.gather(
+            *(analyze_trade_with_ai_async(text, img, aclient) for img, text in items),
+            return_exceptions=True,
+        )
 
+def _run_async(coro):
+    """asyncio.run that also works when called from a running event loop
+    (MCP / FastAPI handlers) by running the coroutine on a helper thread"""
     try:
-        data = json.loads(cleaned)
+        asyncio.get_running_loop()
+    except RuntimeError:
+        return asyncio.run(coro)
+    with ThreadPoolExecutor(max_workers=1) as pool:
+        return pool.submit(asyncio.run, coro).result()
+
+# ---------- RECORD CREATION ----------
+def create_trade_record(ai_json: str, image_path: str, ocr_info: Dict,
+                        logged_at: Optional[str] = None) -> TradeData:
+    try:
+        data = orjson.loads(ai_json)
         print(f"🔍 Parsed AI data: {data}")  # Debug logging
-    except json.JSONDecodeError as e:
+    except orjson.JSONDecodeError as e:
         print(f"❌ JSON parse error: {e}")
         data = {"error": f"JSON parse error: {e}"}
 
     return TradeData(
-        trade_id=str(uuid.uuid4())[:8],
+        trade_id=secrets.token_hex(4),
         ticker=data.get("ticker"),
         timeframe=data.get("timeframe"),
         entry_price=data.get("entry_price"),
@@ -163,105 +368,301 @@ def create_trade_record(ai_json: str, image_path: str, ocr_info: Dict) -> TradeD
         date_time=data.get("date_time"),
         reason_or_annotations=data.get("reason_or_annotations"),
         image_source=os.path.basename(image_path),
-        logged_at=datetime.now().isoformat(),
+        logged_at=logged_at or datetime.now().isoformat(),
         ocr_confidence=f"{ocr_info.get('confidence', 0):.1f}%",
     )
 
 # ---------- SAVE LOGS ----------
-def save_trade_data(trade: TradeData, mode: str = "both") -> List[str]:
+_trade_log_fp = None
+
+def _trade_log():
+    """Shared append handle for TRADE_LOG_PATH, opened once per process"""
+    global _trade_log_fp
+    if _trade_log_fp is None:
+        _trade_log_fp = open(TRADE_LOG_PATH, "a", encoding="utf-8", buffering=1 << 16)
+        atexit.register(_trade_log_fp.close)
+    return _trade_log_fp
+
+def write_trade_log(lines: List[str]) -> None:
+    """Append serialized trades to the JSONL database in one write + flush"""
+    fp = _trade_log()
+    fp.writelines(lines)
+    fp.flush()
+
+def _write_atomic(path: str, payload: bytes) -> None:
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(payload)
+    os.replace(tmp_path, path)
+
+def _load_daily_summary(summary_path: str, trades_path: str, day: str, now_iso: str) -> Dict:
+    """Load the day's counters, creating them if missing.
+
+    Summaries written before the JSONL sidecar existed embed a ``trades``
+    list; that list is moved into ``trades_path`` once and dropped.
+    """
+    try:
+        with open(summary_path, "rb") as f:
+            summary = orjson.loads(f.read())
+    except FileNotFoundError:
+        return {
+            "date": day,
+            "total_trades": 0,
+            "total_pnl": 0.0,
+            "created_at": now_iso,
+        }
+    legacy = summary.pop("trades", None)
+    if legacy is not None:
+        # the sidecar only appears once it holds the whole legacy list, so an
+        # interrupted migration is redone rather than duplicated
+        if not os.path.exists(trades_path):
+            _write_atomic(trades_path, b"".join(orjson.dumps(t) + b"\n" for t in legacy))
+        summary["total_trades"] = len(legacy)
+        summary["total_pnl"] = float(sum(t.get("pnl_amount") or 0 for t in legacy))
+        _write_atomic(summary_path, orjson.dumps(summary, option=orjson.OPT_INDENT_2, default=str))
+    return summary
+
+def save_trade_data(trade: TradeData, mode: str = "both",
+                    log_buffer: Optional[List[str]] = None,
+                    now: Optional[datetime] = None) -> List[str]:
+    """Save a trade to the JSONL log, its own JSON file and the daily summary.
+
+    With ``log_buffer`` the JSONL line is collected there instead of being
+    written, so batch callers can emit all lines via write_trade_log().
+    """
     saved: List[str] = []
+    now = now or datetime.now()
+    now_iso = now.isoformat()
 
     # 1. append to JSONL database
-    os.makedirs(os.path.dirname(TRADE_LOG_PATH), exist_ok=True)
-    with open(TRADE_LOG_PATH, "a", encoding="utf-8") as f:
-        f.write(trade.model_dump_json() + "\n")
+    line = trade.model_dump_json() + "\n"
+    if log_buffer is not None:
+        log_buffer.append(line)
+    else:
+        write_trade_log([line])
     saved.append(TRADE_LOG_PATH)
 
     # 2. individual JSON
     if mode in {"both", "json"}:
-        os.makedirs(OUTPUT_DIR, exist_ok=True)
         fp = os.path.join(
-            OUTPUT_DIR, f"trade_{trade.trade_id}_{datetime.now():%Y%m%d_%H%M%S}.json"
+            OUTPUT_DIR, f"trade_{trade.trade_id}_{now:%Y%m%d_%H%M%S}.json"
         )
-        with open(fp, "w", encoding="utf-8") as f:
-            json.dump(trade.model_dump(), f, indent=2, default=str)
+        with open(fp, "wb") as f:
+            f.write(trade.model_dump_json(indent=2).encode())
         saved.append(fp)
 
-    # 3. daily summary
+    # 3. daily summary: trades are appended to a per-day JSONL sidecar and
+    #    the summary file only holds running counters
     if mode in {"both", "jsonl"}:
-        day = datetime.now().strftime("%Y-%m-%d")
+        day = now.strftime("%Y-%m-%d")
+        trades_path = os.path.join(SUMMARIES_DIR, f"daily_trades_{day}.jsonl")
         summary_path = os.path.join(SUMMARIES_DIR, f"daily_summary_{day}.json")
-        os.makedirs(SUMMARIES_DIR, exist_ok=True)
-        if os.path.exists(summary_path):
-            with open(summary_path, "r", encoding="utf-8") as f:
-                summary = json.load(f)
-        else:
-            summary = {
-                "date": day,
-                "trades": [],
-                "total_trades": 0,
-                "total_pnl": 0,
-                "created_at": datetime.now().isoformat(),
-            }
-        summary["trades"].append(trade.model_dump())
-        summary["total_trades"] = len(summary["trades"])
-        summary["total_pnl"] = sum(t.get("pnl_amount") or 0 for t in summary["trades"])
-        summary["updated_at"] = datetime.now().isoformat()
-        with open(summary_path, "w", encoding="utf-8") as f:
-            json.dump(summary, f, indent=2, default=str)
+
+        summary = _load_daily_summary(summary_path, trades_path, day, now_iso)
+        with open(trades_path, "a", encoding="utf-8") as f:
+            f.write(trade.model_dump_json() + "\n")
+        saved.append(trades_path)
+
+        summary["total_trades"] += 1
+        summary["total_pnl"] += trade.pnl_amount or 0.0
+        summary["updated_at"] = now_iso
+        _write_atomic(summary_path, orjson.dumps(summary, option=orjson.OPT_INDENT_2, default=str))
         saved.append(summary_path)
 
     return saved
 
+# ---------- PIPELINE STAGES ----------
+def _ocr_stage(items: List[Tuple[str, Tuple[int, int]]]) -> Dict[str, object]:
+    """OCR a chunk of preprocessed (path, original_size) images in one
+    tesseract run, per-file as fallback.
+
+    Maps each path to (text, ocr_info), or to the exception it raised.
+    """
+    paths = [path for path, _ in items]
+    try:
+        batch = extract_text_from_images(paths, [size for _, size in items])
+    except Exception as e:
+        print(f"⚠️  Batch OCR failed ({e}), falling back to per-image OCR")
+        batch = None
+    if batch is not None:
+        return batch
+
+    out: Dict[str, object] = {}
+    for path, size in items:
+        try:
+            out[path] = _ocr_prepared(path, size)
+        except Exception as e:
+            out[path] = e
+    return out
+
+def _ai_stage(image_path: str, raw_text: str, ocr_info: Dict, save_mode: str) -> Dict:
+    """AI analysis, record creation and saving for already-OCR'd text"""
+    print(f"🤖 Calling AI analysis...")
+    ai_json = analyze_trade_with_ai(raw_text, image_path)
+    print(f"🤖 AI response received")
+    return _record_stage(image_path, ai_json, ocr_info, save_mode)
+
+def _record_stage(image_path: str, ai_json: str, ocr_info: Dict, save_mode: str,
+                  log_buffer: Optional[List[str]] = None) -> Dict:
+    """Turn an AI response into a saved trade record"""
+    now = datetime.now()
+    print(f"📊 Creating trade record...")
+    trade = create_trade_record(ai_json, image_path, ocr_info, logged_at=now.isoformat())
+    print(f"💾 Saving trade data...")
+    files = save_trade_data(trade, save_mode, log_buffer, now=now)
+    print(f"✅ Processing complete")
+
+    return {
+        "trade_id": trade.trade_id,
+        "image": os.path.basename(image_path),
+        "ticker": trade.ticker,
+        "direction": trade.direction,
+        "pnl_amount": trade.pnl_amount,
+        "confidence": ocr_info["confidence"],
+        "saved_files": files,
+    }
+
+_omp_limit_lock = threading.Lock()
+_omp_limit_users = 0
+_omp_limit_prev: Optional[str] = None
+
+@contextmanager
+def _single_threaded_tesseract():
+    """Stop each tesseract process from spawning its own OpenMP threads
+    while we already run one process per core.
+
+    OMP_THREAD_LIMIT is process-wide, so overlapping batches share one
+    setting: the first to enter sets it, the last to leave restores it.
+    """
+    global _omp_limit_users, _omp_limit_prev
+    with _omp_limit_lock:
+        if _omp_limit_users == 0:
+            _omp_limit_prev = os.environ.get("OMP_THREAD_LIMIT")
+            os.environ["OMP_THREAD_LIMIT"] = "1"
+        _omp_limit_users += 1
+    try:
+        yield
+    finally:
+        with _omp_limit_lock:
+            _omp_limit_users -= 1
+            if _omp_limit_users == 0:
+                if _omp_limit_prev is None:
+                    os.environ.pop("OMP_THREAD_LIMIT", None)
+                else:
+                    os.environ["OMP_THREAD_LIMIT"] = _omp_limit_prev
+
 # ---------- SINGLE IMAGE ----------
 def process_single_image(image_path: str, save_mode: str = "both") -> Dict:
     try:
         print(f"🔍 Starting OCR extraction for: {image_path}")
         raw_text, ocr_info = extract_text_from_image(image_path)
         print(f"📝 OCR completed, confidence: {ocr_info['confidence']:.1f}%")
-        
-        print(f"🤖 Calling AI analysis...")
-        ai_json = analyze_trade_with_ai(raw_text, image_path)
-        print(f"🤖 AI response received")
-        
-        print(f"📊 Creating trade record...")
-        trade = create_trade_record(ai_json, image_path, ocr_info)
-        print(f"💾 Saving trade data...")
-        files = save_trade_data(trade, save_mode)
-        print(f"✅ Processing complete")
-
-        return {
-            "trade_id": trade.trade_id,
-            "image": os.path.basename(image_path),
-            "ticker": trade.ticker,
-            "direction": trade.direction,
-            "pnl_amount": trade.pnl_amount,
-            "confidence": ocr_info["confidence"],
-            "saved_files": files,
-        }
+        return _ai_stage(image_path, raw_text, ocr_info, save_mode)
     except Exception as e:
         print(f"❌ Error in process_single_image: {str(e)}")
         raise
 
 # ---------- BATCH ----------
+_IMG_EXTS = frozenset({".png", ".jpg", ".jpeg", ".bmp", ".gif", ".tiff"})
+
+def _ocr_batch(images: List[str]) -> Dict[str, object]:
+    """Preprocess and OCR ``images`` in parallel.
+
+    Maps each path to (text, ocr_info), or to the exception it raised.
+    """
+    workers = min(len(images), os.cpu_count() or 1)
+    ocr_results: Dict[str, object] = {}
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        # PIL preprocessing holds the GIL, so it runs in worker processes;
+        # prepared images come back as temp files instead of pickled pixels
+        prepared = {img: os.path.join(tmp_dir, f"{i}.png") for i, img in enumerate(images)}
+        sizes: Dict[str, Tuple[int, int]] = {}
+        print(f"🖼  Preprocessing {len(images)} images ({workers} workers)")
+        pool_cls = ProcessPoolExecutor if workers > 1 else ThreadPoolExecutor
+        with pool_cls(max_workers=workers) as pool:
+            futures = {pool.submit(_preprocess_to_file, img, prepared[img]): img for img in images}
+            for fut in as_completed(futures):
+                img = futures[fut]
+                try:
+                    sizes[img] = fut.result()
+                except Exception as e:
+                    ocr_results[img] = e
+
+        # OCR runs out-of-process, so threads scale across cores; each worker
+        # handles a chunk in one tesseract run
+        ready = [img for img in images if img in sizes]
+        n_chunks = max(min(workers, len(ready)), -(-len(ready) // BATCH_OCR_MAX_IMAGES))
+        chunks = [ready[i::n_chunks] for i in range(n_chunks)]
+        original = {path: img for img, path in prepared.items()}
+        print(f"🔍 Starting batch OCR for {len(ready)} images ({workers} workers)")
+        with _single_threaded_tesseract(), ThreadPoolExecutor(max_workers=workers) as pool:
+            futures = [pool.submit(_ocr_stage, [(prepared[img], sizes[img]) for img in chunk])
+                       for chunk in chunks]
+            for fut in as_completed(futures):
+                for path, res in fut.result().items():
+                    ocr_results[original[path]] = res
+    return ocr_results
+
 def process_multiple_images(folder: str, save_mode: str = "both") -> Dict:
     if not os.path.isdir(folder):
         return {"error": f"Folder not found: {folder}"}
 
-    exts = {".png", ".jpg", ".jpeg", ".bmp", ".gif", ".tiff"}
-    images = [os.path.join(folder, f) for f in os.listdir(folder) if f.lower().endswith(tuple(exts))]
+    with os.scandir(folder) as it:
+        images = [e.path for e in it
+                  if e.is_file() and os.path.splitext(e.name)[1].lower() in _IMG_EXTS]
     if not images:
         return {"error": "No image files found"}
 
-    results = {"total": len(images), "ok": 0, "fail": 0, "details": []}
+    # unchanged screenshots reuse their cached OCR result
+    ocr_results: Dict[str, object] = {}
+    cache_keys: Dict[str, str] = {}
     for img in images:
         try:
-            res = process_single_image(img, save_mode)
-            results["details"].append(res)
-            results["ok"] += 1
-        except Exception as e:
-            results["details"].append({"image": os.path.basename(img), "error": str(e)})
-            results["fail"] += 1
+            cache_keys[img] = _ocr_cache_key(img)
+        except OSError as e:
+            # e.g. removed since the folder was listed; reported per image
+            ocr_results[img] = e
+            continue
+        cached = _ocr_cache_get(cache_keys[img])
+        if cached is not None:
+            ocr_results[img] = cached
+    todo = [img for img in images if img not in ocr_results]
+    if todo:
+        fresh = _ocr_batch(todo)
+        for img in todo:
+            if not isinstance(fresh[img], Exception):
+                _ocr_cache_put(cache_keys[img], fresh[img])
+        ocr_results.update(fresh)
+
+    # all DeepSeek calls go out concurrently over one pooled client
+    pending = [(img, ocr_results[img][0]) for img in images
+               if not isinstance(ocr_results[img], Exception)]
+    ai_results: Dict[str, object] = {}
+    if pending:
+        print(f"🤖 Calling AI analysis for {len(pending)} images...")
+        answers = _run_async(_analyze_batch(pending))
+        ai_results = {img: ans for (img, _), ans in zip(pending, answers)}
+
+    results = {"total": len(images), "ok": 0, "fail": 0, "details": []}
+    log_lines: List[str] = []
+    # per-trade files and summaries are written as we go, so the buffered
+    # JSONL lines must reach the log even if the loop is interrupted
+    try:
+        for img in images:
+            try:
+                for stage_result in (ocr_results[img], ai_results.get(img)):
+                    if isinstance(stage_result, Exception):
+                        raise stage_result
+                ai_json = ai_results[img]
+                res = _record_stage(img, ai_json, ocr_results[img][1], save_mode, log_lines)
+                results["details"].append(res)
+                results["ok"] += 1
+            except Exception as e:
+                results["details"].append({"image": os.path.basename(img), "error": str(e)})
+                results["fail"] += 1
+    finally:
+        if log_lines:
+            write_trade_log(log_lines)
     return results
 
 # ---------- CLI ENTRY ----------
@@ -1,5 +1,6 @@
 import os
 import json
+import orjson
 from datetime import datetime
 from typing import List, Optional
 from pydantic import BaseModel
@@ -40,19 +41,21 @@ def search_trade_logs(query: str = "", limit: int = 10) -> dict:
 
     matches = []
     total_count = 0
+    needle = query.lower()
     
     try:
         with open(TRADE_LOG_PATH, "r", encoding="utf-8") as f:
             for line in f:
                 try:
-                    trade = json.loads(line.strip())
+                    trade = orjson.loads(line)
                     total_count += 1
                     
-                    # If no query, return all trades
-                    if not query or query.lower() in json.dumps(trade).lower():
+                    # If no query, return all trades. Match against the
+                    # json.dumps form so queries behave as they always have
+                    if not needle or needle in json.dumps(trade).lower():
                         matches.append(trade)
                         
-                except json.JSONDecodeError:
+                except orjson.JSONDecodeError:
                     continue
     except Exception as e:
         return {"results": [], "total_found": 0, "error": f"Failed to read log file: {str(e)}"}
@@ -98,9 +101,9 @@ def get_trade_stats() -> dict:
     with open(TRADE_LOG_PATH, "r", encoding="utf-8") as f:
         for line in f:
             try:
-                trade = json.loads(line.strip())
+                trade = orjson.loads(line)
                 trades.append(trade)
-            except json.JSONDecodeError:
+            except orjson.JSONDecodeError:
                 continue
     
     if not trades: